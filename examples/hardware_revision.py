@@ -36,9 +36,12 @@ class HardwareRevision:
         self._pin_1 = pin_1
         self._spi = spi
         self._cs = cs
+        # Bound pin getters, so read() skips the attribute lookups
+        self._pin_0_value = pin_0.value
+        self._pin_1_value = pin_1.value
 
     def read(self):
-        return 1 * self._pin_0.value() + 2 * self._pin_1.value()
+        return self._pin_0_value() | (self._pin_1_value() << 1)
 
     def read_spi_flash_size(self):
         """
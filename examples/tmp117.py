@@ -24,8 +24,6 @@
 TMP117 temperature sensor driver.
 """
 
-import struct
-
 # from micropython import const
 
 
@@ -41,16 +39,25 @@ class TMP117:
             raise ValueError("I2C object needed")
         self._i2c = i2c
         self._addr = addr
+        # Every TMP117 register is 16 bits wide, so one buffer serves all reads
+        self._buf = bytearray(2)
+        self._readfrom_mem_into = i2c.readfrom_mem_into
         self._check_device()
 
     def _check_device(self):
         """Check basic comms; REG_DEVICE_ID should always be 0x0117"""
-        id_ = self._i2c.readfrom_mem(self._addr, TMP117.REG_DEVICE_ID, 2)
-        unpacked = struct.unpack(">H", id_)  # ">H" == big endian, two bytes, unsigned
-        if unpacked[0] != 0x0117:
+        self._readfrom_mem_into(self._addr, TMP117.REG_DEVICE_ID, self._buf)
+        if int.from_bytes(self._buf, "big") != 0x0117:  # big endian, two bytes, unsigned
             raise ValueError("Incorrect DEVICE ID (expect '0x117') or bad I2C comms")
 
+    def get_temperature_raw(self):
+        """Return the signed TEMP_RESULT register value, in units of TEMP_RESOLUTION"""
+        self._readfrom_mem_into(self._addr, TMP117.REG_TEMP_RESULT, self._buf)
+        # big endian, two bytes, signed; int.from_bytes() has no signed argument on MicroPython
+        raw = int.from_bytes(self._buf, "big")
+        if raw & 0x8000:
+            raw -= 0x10000
+        return raw
+
     def get_temperature(self):
-        t = self._i2c.readfrom_mem(self._addr, TMP117.REG_TEMP_RESULT, 2)
-        unpacked = struct.unpack(">h", t)  # ">h" == big endian, two bytes, signed
-        return unpacked[0] * TMP117.TEMP_RESOLUTION
+        return self.get_temperature_raw() * TMP117.TEMP_RESOLUTION
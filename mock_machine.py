@@ -15,13 +15,14 @@ import logging
 import time
 
 try:
-    from typing import Dict, Optional
+    from typing import Callable, Dict, List, Optional, Tuple
 except ImportError:
     pass
 
 import asyncio
 import micropython
 from micropython import const
+from micropython import schedule as _schedule
 
 log = logging.getLogger("mock_machine")
 
@@ -29,6 +30,29 @@ log = logging.getLogger("mock_machine")
 # pylint: disable=unused-argument
 # pylint: disable=no-member
 
+# Maximum number of resolved names each Pin.board/Pin.cpu namespace keeps cached
+_PIN_NAME_CACHE_SIZE = const(256)
+
+# ValueError message for reads longer than the stored data. nbytes (and memaddr, if any)
+# follow it in the exception args rather than being formatted into the message.
+_ERR_INSUFFICIENT = "Insufficient bytes to read"
+
+# Shared empty buffer for devices with nothing to read yet
+_EMPTY = b""
+
+# Shared zero-filled bytes objects, keyed by length
+_ZERO_POOL: Dict[int, bytes] = {}
+
+
+def _zeros(n):
+    """
+    Return n zero bytes, reusing a previously allocated object of the same length.
+    """
+    buf = _ZERO_POOL.get(n)
+    if buf is None:
+        buf = _ZERO_POOL[n] = bytes(n)
+    return buf
+
 
 def register_as_machine():
     """
@@ -43,17 +67,20 @@ def register_as_machine():
 
 # machine module interfaces
 
-SOFT_RESET = 0
-PWRON_RESET = 1
-HARD_RESET = 2
-WDT_RESET = 3
-DEEPSLEEP_RESET = 4
+SOFT_RESET = const(0)
+PWRON_RESET = const(1)
+HARD_RESET = const(2)
+WDT_RESET = const(3)
+DEEPSLEEP_RESET = const(4)
 __reset_cause__ = PWRON_RESET
 
 
 def reset_cause():
     """
     https://docs.micropython.org/en/latest/library/machine.html#machine.reset_cause
+
+    Tests can simulate a different cause by setting `mock_machine.__reset_cause__`,
+    eg. `mock_machine.__reset_cause__ = mock_machine.WDT_RESET`.
     """
     return __reset_cause__
 
@@ -118,6 +145,9 @@ class I2C:
         Initialise mock I2C with register values.
         """
         self.devices = {}
+        # Sorted addresses that respond to scan(), and the devices keys they were built from
+        self._scan_addrs: List[int] = []
+        self._scan_keys: List[int] = []
 
     # Device management methods
     def add_device(self, device):
@@ -128,6 +158,15 @@ class I2C:
             raise ValueError("Device with given address already on bus.")
         self.devices[device.addr] = device
 
+    def remove_device(self, addr):
+        """
+        Remove the I2CDevice at address addr from the bus and return it.
+        """
+        device = self.devices.pop(addr, None)
+        if device is None:
+            raise ValueError("No device with given address on bus.")
+        return device
+
     # General methods
     def init(self, scl, sda, *args, freq=400000):
         """
@@ -146,13 +185,16 @@ class I2C:
         Scans all I2C addresses between 0x08 and 0x77 inclusive and return a list of those that
         respond.
 
-        Returns a list of addresses that responded to the scan.
+        Returns a list of addresses that responded to the scan, in ascending order.
         """
-        scan_list = []
-        for addr in self.devices:
-            if 0x08 <= addr <= 0x77:
-                scan_list.append(addr)
-        return scan_list
+        keys = list(self.devices)
+        if keys != self._scan_keys:
+            # The bus changed since the last scan, possibly through devices directly rather
+            # than add_device()/remove_device(). Reserved addresses don't respond to scan().
+            self._scan_keys = keys
+            self._scan_addrs = sorted(addr for addr in keys if 0x08 <= addr <= 0x77)
+        # Copy, so callers can modify the returned list
+        return list(self._scan_addrs)
 
     # Standard bus operations
     def readfrom(self, addr, nbytes, stop=True):
@@ -163,9 +205,10 @@ class I2C:
 
         Returns a bytes object with the data read.
         """
-        if addr not in self.devices:
+        device = self.devices.get(addr)
+        if device is None:
             raise OSError(errno.ENODEV)
-        return self.devices[addr].readfrom(nbytes, stop)
+        return device.readfrom(nbytes, stop)
 
     def readfrom_into(self, addr, buf, stop=True):
         """
@@ -176,9 +219,10 @@ class I2C:
 
         The method returns None.
         """
-        if addr not in self.devices:
+        device = self.devices.get(addr)
+        if device is None:
             raise OSError(errno.ENODEV)
-        return self.devices[addr].readfrom_into(buf, stop)
+        return device.readfrom_into(buf, stop)
 
     def writeto(self, addr, buf, stop=True):
         """
@@ -190,9 +234,10 @@ class I2C:
 
         The function returns the number of ACKs that were received.
         """
-        if addr not in self.devices:
+        device = self.devices.get(addr)
+        if device is None:
             raise OSError(errno.ENODEV)
-        return self.devices[addr].writeto(buf, stop)
+        return device.writeto(buf, stop)
 
     # Memory operations
     def readfrom_mem(self, addr, memaddr, nbytes, *args, addrsize=8):  # pylint: disable=unused-argument
@@ -204,9 +249,10 @@ class I2C:
 
         Returns a bytes object with the data read.
         """
-        if addr not in self.devices:
+        device = self.devices.get(addr)
+        if device is None:
             raise OSError(errno.ENODEV)
-        return self.devices[addr].readfrom_mem(memaddr, nbytes)
+        return device.readfrom_mem(memaddr, nbytes)
 
     def readfrom_mem_into(self, addr, memaddr, buf, *args, addrsize=8):
         """
@@ -217,9 +263,10 @@ class I2C:
 
         The method returns None.
         """
-        if addr not in self.devices:
+        device = self.devices.get(addr)
+        if device is None:
             raise OSError(errno.ENODEV)
-        return self.devices[addr].readfrom_mem_into(memaddr, buf)
+        return device.readfrom_mem_into(memaddr, buf)
 
     def writeto_mem(self, addr, memaddr, buf, *args, addrsize=8):
         """
@@ -230,9 +277,102 @@ class I2C:
 
         The method returns None.
         """
-        if addr not in self.devices:
+        device = self.devices.get(addr)
+        if device is None:
             raise OSError(errno.ENODEV)
-        self.devices[addr].writeto_mem(memaddr, buf)
+        device.writeto_mem(memaddr, buf)
+
+
+class _RegisterFile:
+    """
+    Dict-like view over the buffers used for addressed operations.
+
+    8-bit addresses index a fixed list directly, with None marking an unset address. Any other
+    key, such as a 16-bit address, is kept in a dict instead, so large addresses don't allocate
+    a list slot per address and keys of any type are accepted, as with a plain dict.
+    """
+
+    def __init__(self, regs):
+        self._regs = regs
+        self._extra = {}
+
+    def _in_list(self, memaddr):
+        return isinstance(memaddr, int) and 0 <= memaddr < len(self._regs)
+
+    def __getitem__(self, memaddr):
+        if self._in_list(memaddr):
+            buf = self._regs[memaddr]
+            if buf is None:
+                raise KeyError(memaddr)
+            return buf
+        return self._extra[memaddr]
+
+    def __setitem__(self, memaddr, buf):
+        if self._in_list(memaddr):
+            self._regs[memaddr] = buf
+        else:
+            self._extra[memaddr] = buf
+
+    def __delitem__(self, memaddr):
+        if self._in_list(memaddr):
+            if self._regs[memaddr] is None:
+                raise KeyError(memaddr)
+            self._regs[memaddr] = None
+        else:
+            del self._extra[memaddr]
+
+    def __contains__(self, memaddr):
+        if self._in_list(memaddr):
+            return self._regs[memaddr] is not None
+        return memaddr in self._extra
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __eq__(self, other):
+        # Compare by contents, so a register file equals a dict holding the same buffers
+        if isinstance(other, _RegisterFile):
+            other = dict(other.items())
+        return dict(self.items()) == other
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+    def get(self, memaddr, default=None):
+        if self._in_list(memaddr):
+            buf = self._regs[memaddr]
+            return default if buf is None else buf
+        return self._extra.get(memaddr, default)
+
+    def keys(self):
+        keys = [memaddr for memaddr, buf in enumerate(self._regs) if buf is not None]
+        keys.extend(self._extra)
+        return keys
+
+    def values(self):
+        values = [buf for buf in self._regs if buf is not None]
+        values.extend(self._extra.values())
+        return values
+
+    def items(self):
+        items = [(memaddr, buf) for memaddr, buf in enumerate(self._regs) if buf is not None]
+        items.extend(self._extra.items())
+        return items
+
+    def update(self, other):
+        if hasattr(other, "items"):
+            other = other.items()
+        for memaddr, buf in other:
+            self[memaddr] = buf
+
+    def clear(self):
+        regs = self._regs
+        for memaddr in range(len(regs)):
+            regs[memaddr] = None
+        self._extra.clear()
 
 
 class I2CDevice:
@@ -243,18 +383,34 @@ class I2CDevice:
     representative of a "real" micropython machine class.
     """
 
+    # The buffer used for non-addressed reads. Devices share this empty default until a test
+    # assigns an instance's own readbuf.
+    readbuf = _EMPTY
+
     def __init__(self, addr, i2c):
         self.addr = addr
 
-        # Dict of buffers used for addressed operations
-        self.register_values = {}
-
-        # A buffer used for non-addressed reads
-        self.readbuf = bytes()
+        # List of buffers used for 8-bit addressed operations, indexed by memaddr.
+        # register_values is a dict-like view of the list, plus any other addresses.
+        self._regs = [None] * 256
+        self._register_values = _RegisterFile(self._regs)
 
         # Add self to I2C
         i2c.add_device(self)
 
+    @property
+    def register_values(self):
+        """Dict-like view of the buffers used for addressed operations, keyed by memaddr."""
+        return self._register_values
+
+    @register_values.setter
+    def register_values(self, registers):
+        # Load the new mapping into the existing list, which the reads index directly
+        view = self._register_values
+        if registers is not view:
+            view.clear()
+            view.update(registers)
+
     # Standard bus operations
     def readfrom(self, nbytes, stop=True):
         """
@@ -262,10 +418,14 @@ class I2CDevice:
 
         Returns a bytes object with the data read.
         """
-        if len(self.readbuf) < nbytes:
-            raise ValueError(f"Insufficient bytes to read nbytes={nbytes} with readfrom()")
-        buf = self.readbuf[:nbytes]
-        return buf
+        readbuf = self.readbuf
+        size = len(readbuf)
+        if size < nbytes:
+            raise ValueError(_ERR_INSUFFICIENT, nbytes)
+        # bytes are immutable, so a whole-buffer read can share the stored object
+        if size == nbytes and isinstance(readbuf, bytes):
+            return readbuf
+        return readbuf[:nbytes]
 
     def readfrom_into(self, buf, stop=True):
         """
@@ -276,7 +436,7 @@ class I2CDevice:
         The method returns None.
         """
         if len(self.readbuf) < len(buf):
-            raise ValueError(f"Insufficient bytes to read {len(buf)} with readfrom_into()")
+            raise ValueError(_ERR_INSUFFICIENT, len(buf))
         buf[:] = self.readbuf[: len(buf)]
 
     @staticmethod
@@ -301,14 +461,24 @@ class I2CDevice:
 
         Returns a bytes object with the data read.
         """
-        if memaddr not in self.register_values:
+        regs = self._regs
+        # Index the 8-bit list directly; a negative index would wrap round to the end of regs,
+        # so anything outside it goes through register_values instead
+        if 0 <= memaddr < len(regs):
+            buf = regs[memaddr]
+        else:
+            buf = self._register_values.get(memaddr)
+        if buf is None:
             raise IndexError(
                 f"Unknown memory address memaddr={memaddr}",
             )
-        if len(self.register_values[memaddr]) < nbytes:
-            raise ValueError(f"Insufficient bytes to read nbytes={nbytes} from memaddr={memaddr}")
-        buf = self.register_values[memaddr][:nbytes]
-        return buf
+        size = len(buf)
+        if size < nbytes:
+            raise ValueError(_ERR_INSUFFICIENT, nbytes, memaddr)
+        # bytes are immutable, so a whole-register read can share the stored object
+        if size == nbytes and isinstance(buf, bytes):
+            return buf
+        return buf[:nbytes]
 
     def readfrom_mem_into(self, memaddr, buf):
         """
@@ -319,15 +489,19 @@ class I2CDevice:
 
         The method returns None.
         """
-        if memaddr not in self.register_values:
+        regs = self._regs
+        if 0 <= memaddr < len(regs):
+            stored = regs[memaddr]
+        else:
+            stored = self._register_values.get(memaddr)
+        if stored is None:
             raise IndexError(
                 f"Unknown memory address memaddr=0x{memaddr:x}",
             )
-        if len(self.register_values[memaddr]) < len(buf):
-            raise ValueError(
-                f"Insufficient bytes to read len(buf)={len(buf)} from memaddr={memaddr}"
-            )
-        buf[:] = self.register_values[memaddr][: len(buf)]
+        nbytes = len(buf)
+        if len(stored) < nbytes:
+            raise ValueError(_ERR_INSUFFICIENT, nbytes, memaddr)
+        buf[:] = memoryview(stored)[:nbytes]
 
     def writeto_mem(self, memaddr, buf):
         """
@@ -338,8 +512,21 @@ class I2CDevice:
 
         The method returns None.
         """
+        # Snapshot mutable buffers so later changes by the caller don't alter the register
+        if isinstance(buf, (bytearray, memoryview)):
+            buf = bytes(buf)
         self.register_values[memaddr] = buf
 
+    # Test setup helpers
+    def preload(self, registers):
+        """
+        Set several addressed-operation buffers at once.
+
+        registers is a dict (or iterable of pairs) mapping memaddr to the bytes returned when
+        reading from that address.
+        """
+        self.register_values.update(registers)
+
 
 class RegisterBasedI2CDevice(I2CDevice):
     """
@@ -375,14 +562,12 @@ class RegisterBasedI2CDevice(I2CDevice):
             return 0
 
         # First byte is register address
-        self.current_register = buf[0]
+        start = self.current_register = buf[0]
 
-        # If more bytes, write them to registers
-        if len(buf) > 1:
-            for i, value in enumerate(buf[1:]):
-                reg_addr = self.current_register + i
-                if reg_addr < len(self.registers):
-                    self.registers[reg_addr] = value
+        # If more bytes, write them to registers, dropping any past the last register
+        end = min(start + len(buf) - 1, len(self.registers))
+        if end > start:
+            self.registers[start:end] = buf[1 : 1 + end - start]
 
         return len(buf)
 
@@ -395,12 +580,97 @@ class RegisterBasedI2CDevice(I2CDevice):
         if self.current_register is None:
             raise ValueError("No register address set")
 
-        for i in range(len(buf)):
-            reg_addr = self.current_register + i
-            if reg_addr < len(self.registers):
-                buf[i] = self.registers[reg_addr]
-            else:
-                buf[i] = 0
+        # Copy the registers that exist, then zero-fill any bytes past the last register
+        start = self.current_register
+        nbytes = len(buf)
+        count = max(0, min(nbytes, len(self.registers) - start))
+        buf[:count] = memoryview(self.registers)[start : start + count]
+        if count < nbytes:
+            buf[count:] = _zeros(nbytes - count)
+
+
+class FlatRegisterI2CDevice(I2CDevice):
+    """
+    I2C device storing its addressed-operation registers in one flat bytearray.
+
+    Each memaddr holds a single byte, so a multi-byte write at memaddr also fills the following
+    addresses, as on devices with auto-incrementing register pointers. A flag byte per address
+    tracks which addresses have been written; reading an address that was never written raises
+    the same errors as I2CDevice.
+
+    Reads and writes are single slice copies, which suits devices with many contiguous
+    registers. register_values is not used by this class; use registers and present instead.
+    """
+
+    def __init__(self, addr, i2c, size=256):
+        """
+        Initialize flat register I2C device.
+
+        Args:
+            addr: I2C address of the device
+            i2c: I2C bus to attach to
+            size: Number of byte-wide registers (default 256)
+        """
+        super().__init__(addr, i2c)
+        self.registers = bytearray(size)
+        # One flag per register, set to 1 once the register has been written
+        self.present = bytearray(size)
+        # Source for setting a run of flags with one slice assignment
+        self._set_flags = memoryview(b"\x01" * size)
+
+    def _check_present(self, memaddr, nbytes):
+        present = self.present
+        if not 0 <= memaddr < len(present) or not present[memaddr]:
+            raise IndexError(f"Unknown memory address memaddr={memaddr}")
+        end = memaddr + nbytes
+        if end > len(present) or 0 in memoryview(present)[memaddr:end]:
+            raise ValueError(_ERR_INSUFFICIENT, nbytes, memaddr)
+
+    def readfrom_mem(self, memaddr, nbytes):
+        """
+        Read nbytes from the peripheral starting at memaddr.
+
+        Returns a bytes object with the data read.
+        """
+        self._check_present(memaddr, nbytes)
+        return bytes(memoryview(self.registers)[memaddr : memaddr + nbytes])
+
+    def readfrom_mem_into(self, memaddr, buf):
+        """
+        Read into buf from the peripheral, starting at memaddr.
+
+        The number of bytes read is the length of buf.
+
+        The method returns None.
+        """
+        nbytes = len(buf)
+        self._check_present(memaddr, nbytes)
+        buf[:] = memoryview(self.registers)[memaddr : memaddr + nbytes]
+
+    def writeto_mem(self, memaddr, buf):
+        """
+        Write buf to the peripheral, starting at memaddr.
+
+        Raises IndexError if the write would run past the last register.
+
+        The method returns None.
+        """
+        end = memaddr + len(buf)
+        if memaddr < 0 or end > len(self.registers):
+            raise IndexError(f"Write of {len(buf)} bytes at memaddr={memaddr} is out of range")
+        self.registers[memaddr:end] = buf
+        self.present[memaddr:end] = self._set_flags[: end - memaddr]
+
+    def preload(self, registers):
+        """
+        Write several register blocks at once.
+
+        registers is a dict (or iterable of pairs) mapping memaddr to the bytes written there.
+        """
+        if hasattr(registers, "items"):
+            registers = registers.items()
+        for memaddr, buf in registers:
+            self.writeto_mem(memaddr, buf)
 
 
 class Memory:
@@ -431,27 +701,31 @@ class Pin:
     """
 
     # mode
-    IN = 0
-    OUT = 1
-    OPEN_DRAIN = 2
-    ALT = 3
-    ALT_OPEN_DRAIN = 4
-    ANALOG = 5
+    IN = const(0)
+    OUT = const(1)
+    OPEN_DRAIN = const(2)
+    ALT = const(3)
+    ALT_OPEN_DRAIN = const(4)
+    ANALOG = const(5)
 
     # pull
-    PULL_UP = 0
-    PULL_DOWN = 1
+    PULL_UP = const(0)
+    PULL_DOWN = const(1)
 
-    IRQ_RISING = 269549568
-    IRQ_FALLING = 270598144
+    IRQ_RISING = const(269549568)
+    IRQ_FALLING = const(270598144)
 
     pins: Dict[str, "Pin"] = {}
 
+    # IRQ handlers waiting to run, with the pin that triggered them, oldest first
+    _pending_irqs: List[Tuple[Callable, "Pin"]] = []
+
     """
     Configuring Pin.board and Pin.cpu definitions.
     The actual pin names for your project can be configured
     in this mock Pin class by providing your real board pins.csv file like:
     `Pin.board.configure("../path/to/my-board/pins.csv")`
+    (or a text stream such as `io.StringIO` holding the same contents).
     After this your mock Pin.board.<PIN_NAME> and Pin.cpu.<GPIO_NAME>
     attributes will work similar to the real hardware.
     """
@@ -464,12 +738,14 @@ class Pin:
             self._magic_mode: bool = True
             self._column_index = column_index
             self._namespace_name = namespace_name
+            # Names resolved by __getattr__ and cached as instance attributes
+            self._cached: List[str] = []
 
-        def _load_pins(self, pins_csv_path: Optional[str] = None) -> None:
+        def _load_pins(self, pins_csv_path=None) -> None:
             """Load pins from CSV file
 
             Args:
-                pins_csv_path: Explicit path to pins.csv file
+                pins_csv_path: Explicit path to pins.csv file, or a text stream with its contents
                               - If provided and exists: STRICT mode (only defined pins allowed)
                               - If None or file missing: MAGIC mode (any pin name works)
 
@@ -478,7 +754,15 @@ class Pin:
                 # Comments start with #
                 -HIDDEN_PIN,GPIO_yyy  # Pins starting with - are skipped
             """
+            if pins_csv_path is None and self._magic_mode and not self._pins:
+                # Already in magic mode, so this is a no-op and cached names stay valid
+                return
+
             self._pins = {}
+            # Cached names may resolve differently with the new pins
+            for name in self._cached:
+                delattr(self, name)
+            self._cached = []
 
             if pins_csv_path is None:
                 # No CSV specified - use magic mode for maximum compatibility
@@ -486,27 +770,24 @@ class Pin:
                 return
 
             try:
-                with open(pins_csv_path, "r") as f:
-                    for line in f:
-                        line = line.strip()
-                        # Skip comments and empty lines
-                        if not line or line.startswith("#"):
-                            continue
-
-                        # Parse CSV: BOARD_PIN,CPU_PIN
-                        parts = line.split(",")
-                        if len(parts) >= 2:
-                            board_pin = parts[0].strip()
-                            cpu_pin = parts[1].strip()
-                            # Skip hidden pins (prefixed with -)
-                            if not board_pin.startswith("-"):
-                                # Store mapping based on namespace type
-                                if self._column_index == 0:
-                                    # Pin.board: board name → CPU pin
-                                    self._pins[board_pin] = cpu_pin
-                                else:
-                                    # Pin.cpu: CPU pin → CPU pin
-                                    self._pins[cpu_pin] = cpu_pin
+                if hasattr(pins_csv_path, "read"):
+                    # Already-open text stream, e.g. io.StringIO in tests
+                    lines = [line.strip() for line in pins_csv_path.read().split("\n")]
+                else:
+                    with open(pins_csv_path, "r") as f:
+                        lines = [line.strip() for line in f]
+                # Parse CSV: BOARD_PIN,CPU_PIN, skipping comments and empty lines
+                rows = [line.split(",") for line in lines if line and not line.startswith("#")]
+                # Pin.board maps board name -> CPU pin, Pin.cpu maps CPU pin -> CPU pin
+                key = 0 if self._column_index == 0 else 1
+                self._pins.update(
+                    {
+                        parts[key].strip(): parts[1].strip()
+                        for parts in rows
+                        # Skip hidden pins (prefixed with -)
+                        if len(parts) >= 2 and not parts[0].startswith("-")
+                    }
+                )
 
                 # CSV loaded successfully - use strict mode
                 self._magic_mode = False
@@ -533,10 +814,19 @@ class Pin:
                 # Don't intercept private attributes
                 raise AttributeError(f"Pin.{self._namespace_name} has no attribute '{name}'")
             if name in self._pins:
-                return self._pins[name]
-            if self._magic_mode:
-                return name  # Return any requested name
-            raise AttributeError(f"Pin.{self._namespace_name}.{name} not defined in pins.csv")
+                pin = self._pins[name]
+            elif self._magic_mode:
+                pin = name  # Return any requested name
+            else:
+                raise AttributeError(f"Pin.{self._namespace_name}.{name} not defined in pins.csv")
+            # Cache so later lookups of this name don't reach __getattr__, evicting the oldest
+            # name once full so enumerating many names in magic mode can't grow it unbounded
+            cached = self._cached
+            if len(cached) >= _PIN_NAME_CACHE_SIZE:
+                delattr(self, cached.pop(0))
+            setattr(self, name, pin)
+            cached.append(name)
+            return pin
 
     class _PinBoard(_PinNamespace):
         """Board pin names namespace
@@ -548,8 +838,14 @@ class Pin:
         def __init__(self):
             super().__init__(column_index=0, namespace_name="board")
 
-        def configure(self, pins_csv_path: Optional[str] = None) -> None:
-            """Configure Pin.board and Pin.cpu with pins from CSV file"""
+        def configure(self, pins_csv_path=None) -> None:
+            """Configure Pin.board and Pin.cpu with pins from CSV file path or text stream"""
+            if hasattr(pins_csv_path, "read"):
+                # Both namespaces parse the contents, so give each its own copy of the stream
+                contents = pins_csv_path.read()
+                self._load_pins(io.StringIO(contents))
+                Pin.cpu._load_pins(io.StringIO(contents))  # noqa: F821
+                return
             self._load_pins(pins_csv_path)
             # Also configure cpu namespace
             Pin.cpu._load_pins(pins_csv_path)  # noqa: F821
@@ -573,20 +869,32 @@ class Pin:
         If the matching pin is already created, keep that. It's config
         will be updated in __init__() below
         """
-        if id in Pin.pins:
-            return Pin.pins[id]
+        pins = cls.pins
+        existing = pins.get(id)
+        if existing is not None:
+            return existing
         self = super().__new__(cls)
-        Pin.pins[id] = self
+        pins[id] = self
         return self
 
     # pylint: disable=redefined-builtin
     def __init__(self, id, mode=0, pull=0, value=None, drive=0, alt=-1):
-        self._value = value
+        if not getattr(self, "_initialized", False):
+            self._value = value
+            self._irq_handler = None
+            self._irq_trigger = None
+            self._initialized = True
+        # A cached pin constructed again is only reconfigured; like hardware, it keeps its
+        # current level (unless a value is given) and IRQ registration
+        self._apply_config(mode, pull, value, drive, alt)
+
+    def _apply_config(self, mode, pull, value, drive, alt):
         self._mode = mode
         self._pull = pull
-        self._alt = None
-        self._irq_handler = None
-        self._irq_trigger = None
+        self._drive = drive
+        self._alt = alt
+        if value is not None:
+            self._value = value
 
     def init(self, mode=0, pull=0, alt=0, value=None):
         self._mode = mode
@@ -595,29 +903,79 @@ class Pin:
         self._value = value
 
     def value(self, new_value=None):
-        if new_value is not None:
-            old_value = self._value
-            self._value = int(new_value)
-
-            if self._irq_trigger and self._irq_handler:
-                if self._irq_trigger & self.IRQ_RISING and self._value > old_value:
-                    micropython.schedule(self._irq_handler, self)
-                if self._irq_trigger & self.IRQ_FALLING and self._value < old_value:
-                    micropython.schedule(self._irq_handler, self)
+        if new_value is None:
+            return self._value
+
+        new_value = 1 if new_value else 0
+        handler = self._irq_handler
+        if handler is None:
+            # No IRQ armed (the common case), so there is no edge to detect
+            self._value = new_value
             return None
-        return self._value
 
+        delta = new_value - self._value
+        self._value = new_value
+        trigger = self._irq_trigger
+        if delta and trigger:
+            # The sign of delta gives the edge direction
+            if delta > 0:
+                if trigger & Pin.IRQ_RISING:
+                    self._queue_irq(handler)
+            elif trigger & Pin.IRQ_FALLING:
+                self._queue_irq(handler)
+        return None
+
+    def _queue_irq(self, handler):
+        # Schedule before queueing: schedule() raises RuntimeError when its queue is full, and
+        # a handler queued without a dispatch would shift every later dispatch by one
+        _schedule(Pin._dispatch_irq, None)
+        Pin._pending_irqs.append((handler, self))
+
+    @staticmethod
+    def _dispatch_irq(_):
+        # Run the oldest pending handler, unless flush_irqs() already has
+        pending = Pin._pending_irqs
+        if pending:
+            handler, pin = pending.pop(0)
+            handler(pin)
+
+    @classmethod
+    def flush_irqs(cls):
+        """
+        Run any pending IRQ handlers now, in the order they were triggered.
+
+        Like hardware, handlers are otherwise scheduled to run later (micropython.schedule),
+        so tests can call this after changing a pin's value instead of sleeping.
+        """
+        pending = cls._pending_irqs
+        while pending:
+            handler, pin = pending.pop(0)
+            handler(pin)
+
+    # Without an IRQ handler there is nothing for value() to dispatch, so set directly
     def on(self):
-        self.value(1)
+        if self._irq_handler is None:
+            self._value = 1
+        else:
+            self.value(1)
 
     def off(self):
-        self.value(0)
+        if self._irq_handler is None:
+            self._value = 0
+        else:
+            self.value(0)
 
     def high(self):
-        self.value(1)
+        if self._irq_handler is None:
+            self._value = 1
+        else:
+            self.value(1)
 
     def low(self):
-        self.value(0)
+        if self._irq_handler is None:
+            self._value = 0
+        else:
+            self.value(0)
 
     def irq(
         self, handler=None, trigger=IRQ_FALLING | IRQ_RISING, priority=1, wake=None, hard=False
@@ -630,6 +988,8 @@ class Pin:
         return self._mode
 
     def __call__(self, x=None):
+        if x is None:
+            return self._value
         return self.value(x)
 
 
@@ -689,8 +1049,6 @@ class RTC:
     def __init__(self):
         self._callback = None
         self._timeout = None
-        self._stop = False
-        self._running = False
         self._task = None  # don't start task yet
 
     def wakeup(self, timeout=None, callback=None):
@@ -707,33 +1065,37 @@ class RTC:
         if callback:
             assert callable(self._callback)
 
-        # Start the async loop only when first used
-        if not self._task:
+        # Start the async loop only once there is a callback for it to run
+        if self._task is None and callback is not None:
             self._task = asyncio.create_task(self._wakeup())
 
     async def _wakeup(self):
         log.info("RTC: Starting RTC task")
-        self._running = True
-
-        while not self._stop:
-            timeout = self._timeout if self._timeout else 1000  # default 1s
-            await asyncio.sleep_ms(timeout)
 
-            if self._callback:
-                try:
-                    self._callback()
-                except Exception as e:
-                    log.error("RTC callback raised: %s", e)
+        # Runs until stop() cancels the task
+        try:
+            while True:
+                timeout = self._timeout if self._timeout else 1000  # default 1s
+                await asyncio.sleep_ms(timeout)
 
-        self._running = False
-        log.info("RTC: stopped wakeup task")
+                if self._callback:
+                    try:
+                        self._callback()
+                    except Exception as e:
+                        log.error("RTC callback raised: %s", e)
+        finally:
+            log.info("RTC: stopped wakeup task")
 
     def stop(self):
+        """
+        Stop the wakeup task.
+
+        The task is cancelled rather than waited for, as it can only finish once the caller
+        yields back to the event loop.
+        """
         log.info("RTC: Calling Stop")
-        self._stop = True
         if self._task:
-            while self._running:
-                pass
+            self._task.cancel()
             self._task = None
 
     @staticmethod
@@ -746,9 +1108,18 @@ class RTC:
 
     @staticmethod
     def datetime(datetime=None):
-        now = time.time()
-        t = tuple(time.localtime(now))
-        return t[:3] + (t[6],) + t[3:6] + (round(now * 1000000) % 1000000,)
+        # Read the clock once, as integer nanoseconds, so seconds and subseconds agree
+        try:
+            now_ns = time.time_ns()
+        except AttributeError:
+            now = time.time()
+            t = time.localtime(now)
+            subseconds = round(now * 1000000) % 1000000
+        else:
+            t = time.localtime(now_ns // 1000000000)
+            subseconds = now_ns // 1000 % 1000000
+        # (year, month, day, weekday, hours, minutes, seconds, subseconds)
+        return (t[0], t[1], t[2], t[6], t[3], t[4], t[5], subseconds)
 
 
 class Signal:
@@ -759,16 +1130,21 @@ class Signal:
     def __init__(self, pin, invert):
         self.pin = pin
         self.invert = invert
+        # Physical levels for the logical values, XOR-ed in by value()
+        self._invert_mask = 1 if invert else 0
+        self._on_value = 1 - self._invert_mask
+        self._off_value = self._invert_mask
 
     def on(self):
-        self.pin.value(0 if self.invert else 1)
+        self.pin.value(self._on_value)
 
     def off(self):
-        self.pin.value(1 if self.invert else 0)
+        self.pin.value(self._off_value)
 
     def value(self, val):
-        self.pin.value(val)
-        return self.pin.value()
+        mask = self._invert_mask
+        self.pin.value((1 if val else 0) ^ mask)
+        return self.pin.value() ^ mask
 
 
 class SPI:
@@ -824,8 +1200,12 @@ class SPI:
         Returns a bytes object with the data that was read.
         """
         # Return the data from read_buf again and again, if specified.
-        if self.read_buf:
-            return self.read_buf[:nbytes]
+        read_buf = self.read_buf
+        if read_buf:
+            # bytes are immutable, so a whole-buffer read can share the stored object
+            if len(read_buf) == nbytes and isinstance(read_buf, bytes):
+                return read_buf
+            return read_buf[:nbytes]
 
         # Otherwise, return the data from reads in order of calls, if specified.
         if self.reads:
@@ -852,11 +1232,14 @@ class SPI:
 
         Returns None.
         """
-        # Always record copy of the last written data to write_buf.
-        self.write_buf = bytes(buf)
+        # Always record copy of the last written data to write_buf. bytes are immutable, so
+        # they can be kept as-is; mutable buffers are snapshotted once.
+        if not isinstance(buf, bytes):
+            buf = bytes(buf)
+        self.write_buf = buf
 
-        # Always append copy of the written data to writes in order of calls.
-        self.writes.append(bytes(buf))
+        # Always append the written data to writes in order of calls, sharing the snapshot.
+        self.writes.append(buf)
 
     def write_readinto(self, write_buf, read_buf):
         """
@@ -883,8 +1266,8 @@ class Timer:
     https://docs.micropython.org/en/latest/library/machine.Timer.html
     """
 
-    ONE_SHOT = 0
-    PERIODIC = 1
+    ONE_SHOT = const(0)
+    PERIODIC = const(1)
 
     def __init__(self, id=0, channel=None, mode=None, period=None, callback=None):
         self._id = id  # Micropython timer first positional param is id.
@@ -944,17 +1327,33 @@ class WDT:
         self._last_pat = time.ticks_ms()
 
     async def _tick(self):
-        log.info("Starting WDT loop, timeout is: %s", self._timeout)
+        # The timeout can't be changed once the WDT is started, so bind it and the helpers once
+        timeout = self._timeout
+        ticks_ms = time.ticks_ms
+        ticks_diff = time.ticks_diff
+        sleep_ms = asyncio.sleep_ms
+        log.info("Starting WDT loop, timeout is: %s", timeout)
 
         while self.running:
-            await asyncio.sleep_ms(10)
-            diff = time.ticks_ms() - self._last_pat
+            # Sleep until the watchdog would expire; feed() pushes the deadline out, which is
+            # picked up when the remaining time is recomputed after waking
+            diff = ticks_diff(ticks_ms(), self._last_pat)
+            remaining = timeout - diff
 
-            if diff >= self._timeout:
-                log.error("\nWDT timeout:%s > %s\n", diff, self._timeout)
+            if remaining <= 0:
+                log.error("\nWDT timeout:%s > %s\n", diff, timeout)
                 self.running = False
                 raise RuntimeError()
 
+            await sleep_ms(remaining)
+
+
+# Stream ioctl requests, from micropython/py/stream.h
+_MP_STREAM_POLL = const(3)
+_MP_STREAM_POLL_RD = const(0x0001)
+_MP_STREAM_FLUSH = const(1)
+_MP_STREAM_CLOSE = const(4)
+
 
 class UART(io.IOBase):
     """
@@ -987,6 +1386,14 @@ class UART(io.IOBase):
         self._rx_ring = micropython.RingIO(rx_size)
         self._tx_ring = micropython.RingIO(tx_size)
 
+        if type(self) is UART:
+            # Bind the ring methods directly so reads and writes skip the forwarding methods
+            # below; RingIO.read() with no/-1 size already reads everything. Subclasses keep
+            # the methods, so their overrides are not shadowed by these instance attributes.
+            self.inject_data = self._rx_ring.write
+            self.write = self._tx_ring.write
+            self.read = self._rx_ring.read
+
         if data_for_read:
             self.inject_data(data_for_read)
 
@@ -1022,13 +1429,7 @@ class UART(io.IOBase):
         return self._rx_ring.any()
 
     def ioctl(self, op, arg):
-        # From micropython/py/stream.h
         # This allows the class to be used in asyncio.StreamReader etc.
-        _MP_STREAM_POLL = const(3)
-        _MP_STREAM_POLL_RD = const(0x0001)
-        _MP_STREAM_FLUSH = const(1)
-        _MP_STREAM_CLOSE = const(4)
-
         if op == _MP_STREAM_POLL:
             ret = _MP_STREAM_POLL_RD if self.any() else 0
             return ret
@@ -1043,3 +1444,8 @@ class UART(io.IOBase):
     def get_written_data(self):
         """Get all data written to UART (for test assertions)."""
         return self._tx_ring.read()
+
+    def reset(self):
+        """Discard any unread received data and uncollected written data (for test setup)."""
+        self._rx_ring.read()
+        self._tx_ring.read()
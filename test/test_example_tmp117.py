@@ -8,26 +8,24 @@ Test cases for the TMP117 driver.
 """
 
 import unittest
-from collections import namedtuple
 
 from examples.tmp117 import TMP117
 from mock_machine import I2C, I2CDevice
 
-TestCase = namedtuple("TestCase", ["temperature", "bytes"])
-
-TEST_CASES = [
-    TestCase(-256, bytes([0x80, 0x00])),
-    TestCase(-25, bytes([0xF3, 0x80])),
-    TestCase(-0.1250, bytes([0xFF, 0xF0])),
-    TestCase(-0.0078125, bytes([0xFF, 0xFF])),
-    TestCase(0, bytes([0x00, 0x00])),
-    TestCase(0.0078125, bytes([0x00, 0x01])),
-    TestCase(0.1250, bytes([0x00, 0x10])),
-    TestCase(1, bytes([0x00, 0x80])),
-    TestCase(25, bytes([0x0C, 0x80])),
-    TestCase(100, bytes([0x32, 0x00])),
-    TestCase(255.9921, bytes([0x7F, 0xFF])),
-]
+# (temperature, TEMP_RESULT register bytes)
+TEST_CASES = (
+    (-256, bytes([0x80, 0x00])),
+    (-25, bytes([0xF3, 0x80])),
+    (-0.1250, bytes([0xFF, 0xF0])),
+    (-0.0078125, bytes([0xFF, 0xFF])),
+    (0, bytes([0x00, 0x00])),
+    (0.0078125, bytes([0x00, 0x01])),
+    (0.1250, bytes([0x00, 0x10])),
+    (1, bytes([0x00, 0x80])),
+    (25, bytes([0x0C, 0x80])),
+    (100, bytes([0x32, 0x00])),
+    (255.9921, bytes([0x7F, 0xFF])),
+)
 
 
 class TestImagingModuleADC(unittest.TestCase):
@@ -45,13 +43,23 @@ class TestImagingModuleADC(unittest.TestCase):
         TMP117(self.i2c)
 
     def test_datasheet_examples(self):
+        self.device.preload({TMP117.REG_DEVICE_ID: bytes([0x01, 0x17])})
+        tmp117 = TMP117(self.i2c)
+
+        for temperature, reg_bytes in TEST_CASES:
+            with self.subTest(temperature=temperature):
+                self.device.register_values[TMP117.REG_TEMP_RESULT] = reg_bytes
+                # Datasheet temperatures are multiples of the resolution, rounded for display
+                expected_raw = round(temperature / TMP117.TEMP_RESOLUTION)
+                self.assertEqual(tmp117.get_temperature_raw(), expected_raw)
+
+    def test_get_temperature(self):
         self.device.register_values[TMP117.REG_DEVICE_ID] = bytes([0x01, 0x17])
         tmp117 = TMP117(self.i2c)
 
-        for test_case in TEST_CASES:
-            with self.subTest(test_case=test_case):
-                self.device.register_values[TMP117.REG_TEMP_RESULT] = test_case.bytes
-                self.assertAlmostEqual(tmp117.get_temperature(), test_case.temperature, places=2)
+        self.device.register_values[TMP117.REG_TEMP_RESULT] = bytes([0xF3, 0x80])
+        self.assertEqual(tmp117.get_temperature_raw(), -3200)
+        self.assertEqual(tmp117.get_temperature(), -25)
 
 
 def run():
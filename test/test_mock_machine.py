@@ -3,10 +3,38 @@
 # Phone: +61 3 9945 7510
 #
 
+import asyncio
+import io
 import time
 import unittest
 
-from mock_machine import I2C, I2CDevice, Pin, UART
+import mock_machine
+from mock_machine import (
+    FlatRegisterI2CDevice,
+    I2C,
+    I2CDevice,
+    Pin,
+    RTC,
+    RegisterBasedI2CDevice,
+    Signal,
+    UART,
+)
+
+# Shared empty buffers for arguments the code under test never writes to
+_EMPTY_BYTES = b""
+_EMPTY_BA = bytearray()
+
+# Shared read targets for the I2C read tests, zeroed before use where a test reads into them
+_BUF1 = bytearray(1)
+_BUF3 = bytearray(3)
+
+# Payloads for the I2C read tests: enough bytes for a 3-byte read, and too few
+_DATA_ABC = b"ABC"
+_DATA_AB = b"AB"
+
+# Stream ioctl request and response values, as used by MicroPython's stream protocol
+_MP_STREAM_POLL = 3
+_MP_STREAM_POLL_RD = 0x0001
 
 
 class TestI2C(unittest.TestCase):
@@ -18,172 +46,465 @@ class TestI2C(unittest.TestCase):
 
     NO_SCAN_TEST_CASES = (SCAN_ADDR_MIN - 1, SCAN_ADDR_MAX + 1)
 
+    # Scannable addresses between the test devices, where nothing should respond
+    SCAN_GAP_ADDRS = frozenset(range(SCAN_ADDR_MIN + 1, SCAN_ADDR_MAX))
+
     NO_DEVICE_ADDR = 0x09
 
     MEMADDR_TEST_CASES = (0x00, 0x05, 0x0A, 0x0F, 0x55, 0xAA, 0xFF)
 
+    # Register contents with _DATA_ABC at every test memaddr
+    MEMADDR_ABC = dict.fromkeys(MEMADDR_TEST_CASES, _DATA_ABC)
+    # Register contents expected after writing the str "ABC" to every test memaddr
+    MEMADDR_ABC_STR = dict.fromkeys(MEMADDR_TEST_CASES, "ABC")
+
     def setUp(self):
-        # Make a mock I2C bus with mock I2C devices added to it
-        self.i2c = I2C()
-        self.devices = {}
+        # Use the module's shared mock I2C bus and devices, resetting what tests modify
+        self.i2c = _I2C
+        self.devices = _I2C_DEVICES
+        self._reset()
 
-        for addr in self.ADDR_TEST_CASES:
-            # Make a I2C devices with LP55281 init and add to I2C bus
-            self.devices[addr] = I2CDevice(addr, self.i2c)
+    def _expect(self, exc, fn, *args):
+        # Lighter-weight assertRaises for the error-table tests, without a context manager
+        try:
+            fn(*args)
+        except exc:
+            return
+        self.fail(f"expected {exc.__name__}")
+
+    def _reset(self):
+        for device in self.devices.values():
+            device.readbuf = _EMPTY_BYTES
+            device.register_values.clear()
+
+    def tearDown(self):
+        # Remove any devices a test added to the shared bus
+        for addr in set(self.i2c.devices) - set(self.ADDR_TEST_CASES):
+            self.i2c.remove_device(addr)
 
     def test_scan(self):
         """Test scan of devices with valid addresses."""
+        missing = frozenset(self.ADDR_TEST_CASES).difference(self.i2c.scan())
+        self.assertFalse(missing, f"missing addrs: {sorted(missing)}")
+
+    def test_scan_sorted(self):
+        """Test scan returns addresses in ascending order, like a real bus scan."""
+        for addr in (0x50, 0x20, 0x68):
+            I2CDevice(addr, self.i2c)
+
+        self.assertEqual(self.i2c.scan(), [0x08, 0x20, 0x50, 0x68, 0x77])
+
+    def test_scan_after_add_device(self):
+        """Test scan reflects devices added after a previous scan."""
         scan_list = self.i2c.scan()
-        for addr in self.ADDR_TEST_CASES:
-            with self.subTest(addr=addr):
-                self.assertIn(addr, scan_list)
+        scan_list.append(0x30)  # Modifying the result must not affect later scans
+        self.assertEqual(self.i2c.scan(), [0x08, 0x77])
+
+        I2CDevice(0x40, self.i2c)
+        self.assertEqual(self.i2c.scan(), [0x08, 0x40, 0x77])
+
+    def test_scan_after_devices_changed_directly(self):
+        """Test scan reflects devices added or removed through the devices dict itself."""
+        self.assertEqual(self.i2c.scan(), [0x08, 0x77])
+
+        bus = I2C()
+        self.i2c.devices[0x40] = I2CDevice(0x40, bus)
+        self.assertEqual(self.i2c.scan(), [0x08, 0x40, 0x77])
+
+        del self.i2c.devices[0x40]
+        self.assertEqual(self.i2c.scan(), [0x08, 0x77])
+
+    def test_remove_device(self):
+        """Test remove_device() takes a device off the bus and out of scan."""
+        device = I2CDevice(0x40, self.i2c)
+        self.assertIs(self.i2c.remove_device(0x40), device)
+        self.assertEqual(self.i2c.scan(), [0x08, 0x77])
+        with self.assertRaises(OSError):
+            self.i2c.readfrom(0x40, 0)
+        with self.assertRaises(ValueError):
+            self.i2c.remove_device(0x40)
 
     def test_no_scan(self):
         """Test scan doesn't detect unexpected devices."""
-        scan_list = self.i2c.scan()
-        for addr in range(self.SCAN_ADDR_MIN + 1, self.SCAN_ADDR_MAX):
-            with self.subTest(addr=addr):
-                self.assertFalse(addr in scan_list)
+        unexpected = self.SCAN_GAP_ADDRS.intersection(self.i2c.scan())
+        self.assertFalse(unexpected, f"unexpected addrs: {sorted(unexpected)}")
 
     def test_scan_hidden(self):
         """Test scan doesn't detect devices outside of valid addresses."""
+        # Use a throwaway bus so the shared fixture is never touched
+        bus = I2C()
         for addr in self.NO_SCAN_TEST_CASES:
-            # Add device only for this test
-            I2CDevice(addr, self.i2c)
+            I2CDevice(addr, bus)
 
-        scan_list = self.i2c.scan()
-        for addr in self.NO_SCAN_TEST_CASES:
-            with self.subTest(addr=addr):
-                self.assertFalse(addr in scan_list)
+        unexpected = frozenset(self.NO_SCAN_TEST_CASES).intersection(bus.scan())
+        self.assertFalse(unexpected, f"unexpected addrs: {sorted(unexpected)}")
 
     def test_no_device_error(self):
         """Test no device error correctly sent from applicable operators."""
         ADDR = self.NO_DEVICE_ADDR
         MEMADDR = 0x00
         NBYTES = 0
-        buf = bytearray(0)
-
-        with self.subTest(addr=ADDR, operator="readfrom"):
-            with self.assertRaises(OSError):
-                self.i2c.readfrom(ADDR, NBYTES)
-        with self.subTest(addr=ADDR, operator="readfrom_into"):
-            with self.assertRaises(OSError):
-                self.i2c.readfrom_into(ADDR, buf)
-        with self.subTest(addr=ADDR, operator="writeto"):
-            with self.assertRaises(OSError):
-                self.i2c.writeto(ADDR, buf)
-        with self.subTest(addr=ADDR, operator="readfrom_mem"):
-            with self.assertRaises(OSError):
-                self.i2c.readfrom_mem(ADDR, MEMADDR, NBYTES)
-        with self.subTest(addr=ADDR, operator="readfrom_mem_into"):
-            with self.assertRaises(OSError):
-                self.i2c.readfrom_mem_into(ADDR, MEMADDR, buf)
-        with self.subTest(addr=ADDR, operator="writeto_mem"):
-            with self.assertRaises(OSError):
-                self.i2c.writeto_mem(ADDR, MEMADDR, buf)
+        buf = _EMPTY_BA
+
+        for operator, args in (
+            ("readfrom", (ADDR, NBYTES)),
+            ("readfrom_into", (ADDR, buf)),
+            ("writeto", (ADDR, buf)),
+            ("readfrom_mem", (ADDR, MEMADDR, NBYTES)),
+            ("readfrom_mem_into", (ADDR, MEMADDR, buf)),
+            ("writeto_mem", (ADDR, MEMADDR, buf)),
+        ):
+            with self.subTest(addr=ADDR, operator=operator):
+                self._expect(OSError, getattr(self.i2c, operator), *args)
 
     def test_read_unknown_memaddr(self):
         """Test unknown mem addr error correctly sent from applicable operators."""
         NBYTES = 0
-        buf = bytearray(0)
+        buf = _EMPTY_BA
+        cases = [
+            (addr, memaddr, operator, arg)
+            for addr in self.ADDR_TEST_CASES
+            for memaddr in self.MEMADDR_TEST_CASES
+            for operator, arg in (("readfrom_mem", NBYTES), ("readfrom_mem_into", buf))
+        ]
+        i2c = self.i2c
+        subTest = self.subTest
+        expect = self._expect
+        for addr, memaddr, operator, arg in cases:
+            with subTest(addr=addr, memaddr=memaddr, operator=operator):
+                expect(IndexError, getattr(i2c, operator), addr, memaddr, arg)
+
+    def test_readbuf_default(self):
+        """Test devices start with an empty readbuf, and assigning one leaves the others alone."""
+        bus = I2C()
+        first = I2CDevice(0x40, bus)
+        second = I2CDevice(0x41, bus)
+
+        first.readbuf = _DATA_AB
+
+        self.assertEqual(bus.readfrom(0x40, 2), _DATA_AB)
+        self.assertEqual(second.readbuf, _EMPTY_BYTES)
+        self._expect(ValueError, bus.readfrom, 0x41, 1)
+
+    def test_read_negative_memaddr(self):
+        """Test a negative mem addr is unknown, rather than wrapping round to the last one."""
         for addr in self.ADDR_TEST_CASES:
-            for memaddr in self.MEMADDR_TEST_CASES:
-                with self.subTest(addr=addr, memaddr=memaddr, operator="readfrom_mem"):
-                    with self.assertRaises(IndexError):
-                        self.i2c.readfrom_mem(addr, memaddr, NBYTES)
-                with self.subTest(addr=addr, memaddr=memaddr, operator="readfrom_mem_into"):
-                    with self.assertRaises(IndexError):
-                        self.i2c.readfrom_mem_into(addr, memaddr, buf)
+            self.devices[addr].preload({0xFF: _DATA_AB})
+            with self.subTest(addr=addr):
+                self._expect(IndexError, self.i2c.readfrom_mem, addr, -1, 2)
+                self._expect(IndexError, self.i2c.readfrom_mem_into, addr, -1, bytearray(2))
 
     def test_read_insufficient_none(self):
         """Test insufficient bytes error correctly sent from applicable operators."""
         NBYTES = 1
-        buf = bytearray(1)
+        buf = _BUF1
         for addr in self.ADDR_TEST_CASES:
-            # Directly manipulate general readbuf with zero bytes
-            self.devices[addr].readbuf = bytes(0)
-            with self.subTest(addr=addr, operator="readfrom"):
-                with self.assertRaises(ValueError):
-                    self.i2c.readfrom(addr, NBYTES)
-            with self.subTest(addr=addr, operator="readfrom_into"):
-                with self.assertRaises(ValueError):
-                    self.i2c.readfrom_into(addr, buf)
-            for memaddr in self.MEMADDR_TEST_CASES:
-                # Directly manipulate address memaddr with zero bytes
-                self.devices[addr].register_values[memaddr] = bytes(0)
-                with self.subTest(addr=addr, memaddr=memaddr, operator="readfrom_mem"):
-                    with self.assertRaises(ValueError):
-                        self.i2c.readfrom_mem(addr, memaddr, NBYTES)
-                with self.subTest(addr=addr, memaddr=memaddr, operator="readfrom_mem_into"):
-                    with self.assertRaises(ValueError):
-                        self.i2c.readfrom_mem_into(addr, memaddr, buf)
+            # Directly manipulate general readbuf and every memaddr with zero bytes
+            device = self.devices[addr]
+            device.readbuf = _EMPTY_BYTES
+            device.preload(dict.fromkeys(self.MEMADDR_TEST_CASES, _EMPTY_BYTES))
+            self._assert_insufficient(addr, NBYTES, buf)
 
     def test_read_insufficient_some(self):
         """Test insufficient bytes error correctly sent from applicable operators."""
         NBYTES = 3
-        buf = bytearray(3)
+        buf = _BUF3
         for addr in self.ADDR_TEST_CASES:
-            # Directly manipulate general readbuf with too few bytes
-            self.devices[addr].readbuf = b"AB"
-            with self.subTest(addr=addr, operator="readfrom"):
-                with self.assertRaises(ValueError):
-                    self.i2c.readfrom(addr, NBYTES)
-            with self.subTest(addr=addr, operator="readfrom_into"):
-                with self.assertRaises(ValueError):
-                    self.i2c.readfrom_into(addr, buf)
-            for memaddr in self.MEMADDR_TEST_CASES:
-                # Directly manipulate address memaddr with too few bytes
-                self.devices[addr].register_values[memaddr] = b"AB"
-                with self.subTest(addr=addr, memaddr=memaddr, operator="readfrom_mem"):
-                    with self.assertRaises(ValueError):
-                        self.i2c.readfrom_mem(addr, memaddr, NBYTES)
-                with self.subTest(addr=addr, memaddr=memaddr, operator="readfrom_mem_into"):
-                    with self.assertRaises(ValueError):
-                        self.i2c.readfrom_mem_into(addr, memaddr, buf)
+            # Directly manipulate general readbuf and every memaddr with too few bytes
+            device = self.devices[addr]
+            device.readbuf = _DATA_AB
+            device.preload(dict.fromkeys(self.MEMADDR_TEST_CASES, _DATA_AB))
+            self._assert_insufficient(addr, NBYTES, buf)
+
+    def _assert_insufficient(self, addr, nbytes, buf):
+        i2c = self.i2c
+        subTest = self.subTest
+        assertRaises = self.assertRaises
+        with subTest(addr=addr, operator="readfrom"):
+            with assertRaises(ValueError):
+                i2c.readfrom(addr, nbytes)
+        with subTest(addr=addr, operator="readfrom_into"):
+            with assertRaises(ValueError):
+                i2c.readfrom_into(addr, buf)
+        readfrom_mem = i2c.readfrom_mem
+        readfrom_mem_into = i2c.readfrom_mem_into
+        for memaddr in self.MEMADDR_TEST_CASES:
+            with subTest(addr=addr, memaddr=memaddr, operator="readfrom_mem"):
+                with assertRaises(ValueError):
+                    readfrom_mem(addr, memaddr, nbytes)
+            with subTest(addr=addr, memaddr=memaddr, operator="readfrom_mem_into"):
+                with assertRaises(ValueError):
+                    readfrom_mem_into(addr, memaddr, buf)
 
     def test_read(self):
         """Test valid reads from applicable operators."""
         NBYTES = 3
-        buf = bytearray(3)
+        buf = _BUF3
+        buf[:] = b"\x00\x00\x00"
+        i2c = self.i2c
+        devices = self.devices
+        subTest = self.subTest
+        assertEqual = self.assertEqual
+        readfrom_mem = i2c.readfrom_mem
+        readfrom_mem_into = i2c.readfrom_mem_into
         for addr in self.ADDR_TEST_CASES:
-            # Directly manipulate general readbuf with enough bytes
-            self.devices[addr].readbuf = b"ABC"
-            with self.subTest(addr=addr, operator="readfrom"):
-                out = self.i2c.readfrom(addr, NBYTES)
-                self.assertEqual(out, b"ABC")
-            with self.subTest(addr=addr, operator="readfrom_into"):
-                self.i2c.readfrom_into(addr, buf)
-                self.assertEqual(buf, b"ABC")
-            for memaddr in self.MEMADDR_TEST_CASES:
-                # Directly manipulate address memaddr with enough bytes
-                self.devices[addr].register_values[memaddr] = b"ABC"
-                with self.subTest(addr=addr, memaddr=memaddr, operator="readfrom_mem"):
-                    out = self.i2c.readfrom_mem(addr, memaddr, NBYTES)
-                    self.assertEqual(out, b"ABC")
-                with self.subTest(addr=addr, memaddr=memaddr, operator="readfrom_mem_into"):
-                    self.i2c.readfrom_mem_into(addr, memaddr, buf)
-                    self.assertEqual(buf, b"ABC")
+            # Directly manipulate general readbuf and every memaddr with enough bytes
+            device = devices[addr]
+            device.readbuf = _DATA_ABC
+            device.preload(self.MEMADDR_ABC)
+            with subTest(addr=addr):
+                out = i2c.readfrom(addr, NBYTES)
+                assertEqual(out, _DATA_ABC, "readfrom")
+                i2c.readfrom_into(addr, buf)
+                assertEqual(buf, _DATA_ABC, "readfrom_into")
+                # Zero buf in place between reads, so a read that does nothing can't pass
+                buf[:] = b"\x00\x00\x00"
+                for memaddr in self.MEMADDR_TEST_CASES:
+                    out = readfrom_mem(addr, memaddr, NBYTES)
+                    assertEqual(out, _DATA_ABC, f"readfrom_mem memaddr={memaddr:#x}")
+                    readfrom_mem_into(addr, memaddr, buf)
+                    assertEqual(buf, _DATA_ABC, f"readfrom_mem_into memaddr={memaddr:#x}")
+                    buf[:] = b"\x00\x00\x00"
 
     def test_writeto(self):
         """Test basic writeto()."""
         buf = "ABC"
         for addr in self.ADDR_TEST_CASES:
-            with self.subTest(addr=addr):
-                num = self.i2c.writeto(addr, buf)
-                self.assertEqual(num, len(buf))
+            num = self.i2c.writeto(addr, buf)
+            self.assertEqual(num, len(buf), f"addr={addr:#x}")
 
     def test_writeto_mem(self):
         """Test basic write_to_mem()."""
+        # A str payload, as the bytes and bytearray cases are covered elsewhere
         buf = "ABC"
+        writeto_mem = self.i2c.writeto_mem
         for addr in self.ADDR_TEST_CASES:
             for memaddr in self.MEMADDR_TEST_CASES:
-                with self.subTest(addr=addr, memaddr=memaddr):
-                    self.i2c.writeto_mem(addr, memaddr, buf)
-                    # Directly check internal memaddr value
-                    self.assertEqual(self.devices[addr].register_values[memaddr], buf)
+                writeto_mem(addr, memaddr, buf)
+            # Directly check internal memaddr values, all at once
+            registers = self.devices[addr].register_values
+            self.assertEqual(registers, self.MEMADDR_ABC_STR, f"addr={addr:#x}")
+
+    def test_writeto_mem_snapshot(self):
+        """Test writeto_mem() keeps a copy of a mutable buffer."""
+        buf = bytearray(b"ABC")
+        for addr in self.ADDR_TEST_CASES:
+            self.i2c.writeto_mem(addr, 0x00, buf)
+            buf[0] = ord("X")
+            self.assertEqual(self.i2c.readfrom_mem(addr, 0x00, 3), b"ABC", f"addr={addr:#x}")
+            buf[0] = ord("A")
+
+    def test_preload(self):
+        """Test preload() sets several memaddrs at once."""
+        registers = {memaddr: bytes([memaddr]) for memaddr in self.MEMADDR_TEST_CASES}
+        for addr in self.ADDR_TEST_CASES:
+            self.devices[addr].preload(registers)
+            for memaddr in self.MEMADDR_TEST_CASES:
+                out = self.i2c.readfrom_mem(addr, memaddr, 1)
+                self.assertEqual(out, bytes([memaddr]), f"addr={addr:#x} memaddr={memaddr:#x}")
+
+    def test_register_values_16bit_memaddr(self):
+        """Test register_values grows to hold 16-bit memory addresses."""
+        MEMADDR = 0x1234
+        for addr in self.ADDR_TEST_CASES:
+            device = self.devices[addr]
+            with self.subTest(addr=addr):
+                self.assertNotIn(MEMADDR, device.register_values)
+                self.i2c.writeto_mem(addr, MEMADDR, b"AB", addrsize=16)
+                self.assertIn(MEMADDR, device.register_values)
+                self.assertEqual(self.i2c.readfrom_mem(addr, MEMADDR, 2, addrsize=16), b"AB")
+                self.assertEqual(device.register_values.items(), [(MEMADDR, b"AB")])
+                with self.assertRaises(KeyError):
+                    _ = device.register_values[MEMADDR + 1]
+
+    def test_register_values_large_memaddr(self):
+        """Test a large memaddr is stored without growing the 8-bit register list."""
+        addr = self.SCAN_ADDR_MIN
+        device = self.devices[addr]
+        MEMADDR = 0x1_0000
+
+        self.i2c.writeto_mem(addr, MEMADDR, _DATA_AB)
+
+        self.assertEqual(len(device._regs), 256)
+        self.assertEqual(self.i2c.readfrom_mem(addr, MEMADDR, 2), _DATA_AB)
+        self.assertEqual(device.register_values, {MEMADDR: _DATA_AB})
+        del device.register_values[MEMADDR]
+        self.assertNotIn(MEMADDR, device.register_values)
+
+    def test_register_values_non_int_key(self):
+        """Test register_values accepts any key, like the dict it replaces."""
+        registers = self.devices[self.SCAN_ADDR_MIN].register_values
+
+        registers["status"] = _DATA_AB
+        registers[0x10] = _DATA_ABC
+
+        self.assertIn("status", registers)
+        self.assertEqual(registers["status"], _DATA_AB)
+        self.assertEqual(registers.get("missing", _EMPTY_BYTES), _EMPTY_BYTES)
+        self.assertEqual(registers, {0x10: _DATA_ABC, "status": _DATA_AB})
+        with self.assertRaises(KeyError):
+            _ = registers["missing"]
+
+        registers.clear()
+        self.assertEqual(len(registers), 0)
+
+    def test_register_values_eq_repr(self):
+        """Test register_values compares equal to, and reprs like, a dict of its contents."""
+        device = self.devices[self.SCAN_ADDR_MIN]
+        device.preload({0x10: _DATA_AB})
+
+        self.assertEqual(device.register_values, {0x10: _DATA_AB})
+        self.assertNotEqual(device.register_values, {0x10: _DATA_ABC})
+        other = I2CDevice(0x40, self.i2c)
+        other.preload({0x10: _DATA_AB})
+        self.assertEqual(device.register_values, other.register_values)
+        self.assertEqual(repr(device.register_values), repr({0x10: _DATA_AB}))
+
+    def test_register_values_assign(self):
+        """Test assigning a dict to register_values replaces the registers used by reads."""
+        addr = self.SCAN_ADDR_MIN
+        device = self.devices[addr]
+        device.preload({0x10: _DATA_AB})
+
+        device.register_values = {0x20: _DATA_ABC}
+
+        self.assertEqual(self.i2c.readfrom_mem(addr, 0x20, 3), _DATA_ABC)
+        self._expect(IndexError, self.i2c.readfrom_mem, addr, 0x10, 2)
+        self.assertEqual(device.register_values, {0x20: _DATA_ABC})
+
+        # Assigning the view to itself keeps its contents
+        device.register_values = device.register_values
+        self.assertEqual(device.register_values, {0x20: _DATA_ABC})
+
+
+# Make a mock I2C bus with mock I2C devices added to it, built once and shared by TestI2C
+_I2C = I2C()
+# Make a I2C devices with LP55281 init and add to I2C bus
+_I2C_DEVICES = {addr: I2CDevice(addr, _I2C) for addr in TestI2C.ADDR_TEST_CASES}
+
+
+class TestRegisterBasedI2CDevice(unittest.TestCase):
+    """Class for testing I2C class using RegisterBasedI2CDevice."""
+
+    ADDR = 0x51
+    REGISTER_COUNT = 8
+
+    def setUp(self):
+        self.i2c = I2C()
+        self.device = RegisterBasedI2CDevice(self.ADDR, self.i2c, self.REGISTER_COUNT)
+
+    def test_writeto(self):
+        """Test writeto() sets the register pointer and writes following bytes."""
+        num = self.i2c.writeto(self.ADDR, b"\x02\x11\x22\x33")
+        self.assertEqual(num, 4)
+        self.assertEqual(self.device.current_register, 0x02)
+        self.assertEqual(self.device.registers, b"\x00\x00\x11\x22\x33\x00\x00\x00")
+
+    def test_writeto_past_end(self):
+        """Test writeto() drops bytes beyond the last register."""
+        self.i2c.writeto(self.ADDR, b"\x06\x11\x22\x33")
+        self.assertEqual(self.device.registers, b"\x00\x00\x00\x00\x00\x00\x11\x22")
+        self.assertEqual(len(self.device.registers), self.REGISTER_COUNT)
+
+        self.i2c.writeto(self.ADDR, b"\x09\x44")
+        self.assertEqual(self.device.registers, b"\x00\x00\x00\x00\x00\x00\x11\x22")
+
+    def test_readfrom_into(self):
+        """Test readfrom_into() reads from the register pointer set by writeto()."""
+        self.device.registers[:] = b"\x10\x11\x12\x13\x14\x15\x16\x17"
+        buf = bytearray(3)
+
+        with self.assertRaises(ValueError):
+            self.i2c.readfrom_into(self.ADDR, buf)
+
+        self.i2c.writeto(self.ADDR, b"\x02")
+        self.i2c.readfrom_into(self.ADDR, buf)
+        self.assertEqual(buf, b"\x12\x13\x14")
+
+    def test_readfrom_into_past_end(self):
+        """Test readfrom_into() reads zeros beyond the last register."""
+        self.device.registers[:] = b"\x10\x11\x12\x13\x14\x15\x16\x17"
+        buf = bytearray(b"\xff\xff\xff\xff")
+
+        self.i2c.writeto(self.ADDR, b"\x06")
+        self.i2c.readfrom_into(self.ADDR, buf)
+        self.assertEqual(buf, b"\x16\x17\x00\x00")
+
+        self.i2c.writeto(self.ADDR, b"\x0a")
+        self.i2c.readfrom_into(self.ADDR, buf)
+        self.assertEqual(buf, b"\x00\x00\x00\x00")
+
+
+class TestFlatRegisterI2CDevice(unittest.TestCase):
+    """Class for testing I2C class using FlatRegisterI2CDevice."""
+
+    ADDR = 0x52
+
+    def setUp(self):
+        self.i2c = I2C()
+        self.device = FlatRegisterI2CDevice(self.ADDR, self.i2c)
+
+    def test_writeto_mem_readfrom_mem(self):
+        """Test multi-byte writes fill consecutive registers."""
+        self.i2c.writeto_mem(self.ADDR, 0x10, b"\x01\x02\x03")
+        self.assertEqual(self.i2c.readfrom_mem(self.ADDR, 0x10, 3), b"\x01\x02\x03")
+        self.assertEqual(self.i2c.readfrom_mem(self.ADDR, 0x11, 2), b"\x02\x03")
+
+        buf = bytearray(2)
+        self.i2c.readfrom_mem_into(self.ADDR, 0x10, buf)
+        self.assertEqual(buf, b"\x01\x02")
+
+    def test_unwritten_registers(self):
+        """Test reading registers that were never written raises like I2CDevice."""
+        self.device.preload({0x20: b"\xaa"})
+
+        with self.assertRaises(IndexError):
+            self.i2c.readfrom_mem(self.ADDR, 0x21, 1)
+        with self.assertRaises(ValueError):
+            self.i2c.readfrom_mem(self.ADDR, 0x20, 2)
+        with self.assertRaises(IndexError):
+            self.i2c.writeto_mem(self.ADDR, 0xFF, b"\x00\x00")
+
+    def test_partially_written_run(self):
+        """Test a read spanning an unwritten register, or the last register, is insufficient."""
+        self.device.preload({0x30: b"\x01", 0x32: b"\x03", 0xFE: b"\xfe\xff"})
+
+        self.assertEqual(self.device.present[0x30:0x33], b"\x01\x00\x01")
+        with self.assertRaises(ValueError):
+            self.i2c.readfrom_mem(self.ADDR, 0x30, 3)
+        self.assertEqual(self.i2c.readfrom_mem(self.ADDR, 0xFE, 2), b"\xfe\xff")
+        with self.assertRaises(ValueError):
+            self.i2c.readfrom_mem(self.ADDR, 0xFE, 3)
+
+    def test_writeto_mem_snapshot(self):
+        """Test later changes to the written buffer do not alter the registers."""
+        data = bytearray(b"\x01\x02")
+        self.i2c.writeto_mem(self.ADDR, 0x00, data)
+        data[0] = 0xFF
+        self.assertEqual(self.i2c.readfrom_mem(self.ADDR, 0x00, 2), b"\x01\x02")
 
 
 class TestPin(unittest.TestCase):
+    # pins.csv contents, passed to Pin.board.configure() as text streams
+    PINS_STRICT_CSV = (
+        "# Test pins file\n"
+        "LED_GREEN,GPIO_01\n"
+        "LED_RED,GPIO_02\n"
+        "SPI5_SCK,GPIO_10\n"
+        "-HIDDEN_PIN,GPIO_99\n"  # Should be skipped
+        "\n"  # Empty line
+        "# Another comment\n"
+    )
+    PINS_A_CSV = "PIN_A,GPIO_01\n"
+    PINS_B_CSV = "PIN_B,GPIO_02\n"
+    PINS_CACHE_CSV = "LED_BLUE,GPIO_03\n"
+
+    def tearDown(self):
+        # Drop handlers a test triggered but never ran, so they can't fire in a later test
+        Pin._pending_irqs.clear()
+        # Forget the test's pins, as a cached pin keeps its IRQ handler when reconstructed
+        Pin.pins.clear()
+
     @staticmethod
     def test_pin_irq():
         fired = False
@@ -199,11 +520,54 @@ class TestPin(unittest.TestCase):
         assert not fired
 
         pin.value(1)
-
-        time.sleep_ms(1)  # pylint: disable=no-member
+        Pin.flush_irqs()
 
         assert fired
 
+    @staticmethod
+    def test_pin_irq_scheduled():
+        fired = []
+
+        pin_a = Pin("five", value=0)
+        pin_b = Pin("six", value=0)
+        pin_a.irq(fired.append, trigger=Pin.IRQ_RISING)
+        pin_b.irq(fired.append, trigger=Pin.IRQ_RISING)
+
+        pin_b.value(1)
+        pin_a.value(1)
+
+        # Each scheduled dispatch runs the oldest pending handler
+        Pin._dispatch_irq(None)
+        assert fired[:1] == [pin_b]
+        Pin._dispatch_irq(None)
+        assert fired == [pin_b, pin_a]
+
+        # Let the real scheduled dispatches run; they find nothing left to do
+        time.sleep_ms(0)  # pylint: disable=no-member
+        Pin.flush_irqs()
+        assert fired == [pin_b, pin_a], "Should not run the handlers again"
+
+    def test_pin_irq_schedule_full(self):
+        fired = []
+
+        def schedule_full(func, arg):
+            raise RuntimeError("schedule queue full")
+
+        pin = Pin("eight", value=0)
+        pin.irq(fired.append, trigger=Pin.IRQ_RISING)
+
+        orig_schedule = mock_machine._schedule
+        mock_machine._schedule = schedule_full
+        try:
+            with self.assertRaises(RuntimeError):
+                pin.value(1)
+        finally:
+            mock_machine._schedule = orig_schedule
+
+        # The failed trigger must leave nothing queued for a later dispatch or flush
+        Pin.flush_irqs()
+        self.assertEqual(fired, [])
+
     @staticmethod
     def test_pin_reused():
         pin_first_user = Pin("one")
@@ -223,6 +587,59 @@ class TestPin(unittest.TestCase):
         assert pin_different.value() == 0, "Should not have changed"
         assert pin_second_user.value() == 0
 
+    @staticmethod
+    def test_pin_reconstruct_keeps_state():
+        fired = []
+
+        pin = Pin("four", Pin.ALT, value=0, drive=1, alt=5)
+        pin.irq(fired.append, trigger=Pin.IRQ_RISING)
+
+        assert (pin._drive, pin._alt) == (1, 5)
+
+        pin_again = Pin("four", Pin.IN, Pin.PULL_UP, drive=2, alt=7)
+
+        assert pin_again is pin
+        assert pin.mode() == Pin.IN
+        assert (pin._drive, pin._alt) == (2, 7), "Should apply drive and alt like the first time"
+        assert pin.value() == 0, "Should keep the current level"
+
+        pin.value(1)
+
+        Pin.flush_irqs()
+
+        assert fired == [pin], "Should keep the IRQ registration"
+
+    @staticmethod
+    def test_pin_instance_attributes():
+        pin = Pin("seven")
+
+        # Tests attach their own state and stub methods on mock instances
+        pin.label = "status LED"
+        pin.value = lambda *args: 1
+
+        assert pin.label == "status LED"
+        assert pin.value() == 1
+
+    @staticmethod
+    def test_pin_on_off_call():
+        fired = []
+
+        pin = Pin("three")
+        pin.off()
+        assert pin() == 0
+        pin.on()
+        assert pin() == 1
+        pin(0)
+        assert pin.value() == 0
+
+        pin.irq(fired.append, trigger=Pin.IRQ_RISING)
+        pin.high()
+
+        Pin.flush_irqs()
+
+        assert pin() == 1
+        assert fired == [pin]
+
     def test_pin_board_magic_mode_default(self):
         """Test Pin.board and Pin.cpu default to magic mode without configuration"""
         # Should return any pin name in magic mode (default)
@@ -236,67 +653,73 @@ class TestPin(unittest.TestCase):
 
     def test_pin_board_magic_mode_explicit(self):
         """Test Pin.board with explicit None configuration stays in magic mode"""
+        self.addCleanup(Pin.board.configure, None)
         Pin.board.configure(None)
         assert Pin.board.SOME_PIN == "SOME_PIN"
         assert Pin.board.ANOTHER_PIN == "ANOTHER_PIN"
 
+        # Configuring magic mode again is a no-op that keeps the resolved names cached
+        Pin.board.configure(None)
+        assert "SOME_PIN" in Pin.board._cached
+        assert Pin.board.SOME_PIN == "SOME_PIN"
+
     def test_pin_board_strict_mode_with_csv(self):
         """Test Pin.board in strict mode with a valid pins.csv file"""
+        self.addCleanup(Pin.board.configure, None)
+        # Configure with the test CSV
+        Pin.board.configure(io.StringIO(self.PINS_STRICT_CSV))
+
+        # Pin.board: board name → CPU pin
+        assert Pin.board.LED_GREEN == "GPIO_01"
+        assert Pin.board.LED_RED == "GPIO_02"
+        assert Pin.board.SPI5_SCK == "GPIO_10"
+
+        # Pin.cpu: CPU pin → CPU pin (identity)
+        assert Pin.cpu.GPIO_01 == "GPIO_01"
+        assert Pin.cpu.GPIO_02 == "GPIO_02"
+        assert Pin.cpu.GPIO_10 == "GPIO_10"
+
+        # Hidden pin should not be accessible by board name
+        with self.assertRaises(AttributeError) as ctx:
+            _ = Pin.board.HIDDEN_PIN
+        assert "not defined in pins.csv" in str(ctx.exception)
+
+        # Hidden pin's CPU pin (GPIO_99) should not be in Pin.cpu either
+        with self.assertRaises(AttributeError) as ctx:
+            _ = Pin.cpu.GPIO_99
+        assert "not defined in pins.csv" in str(ctx.exception)
+
+        # Undefined pin should raise error in strict mode
+        with self.assertRaises(AttributeError) as ctx:
+            _ = Pin.board.UNDEFINED_PIN
+        assert "not defined in pins.csv" in str(ctx.exception)
+
+        with self.assertRaises(AttributeError) as ctx:
+            _ = Pin.cpu.UNDEFINED_PIN
+        assert "not defined in pins.csv" in str(ctx.exception)
+
+    def test_pin_board_strict_mode_with_csv_path(self):
+        """Test Pin.board in strict mode configured from a pins.csv file path"""
         import os
 
-        # Create a test pins.csv file
-        test_path = "test_pins_strict.csv"
-        try:
-            with open(test_path, "w") as f:
-                f.write("# Test pins file\n")
-                f.write("LED_GREEN,GPIO_01\n")
-                f.write("LED_RED,GPIO_02\n")
-                f.write("SPI5_SCK,GPIO_10\n")
-                f.write("-HIDDEN_PIN,GPIO_99\n")  # Should be skipped
-                f.write("\n")  # Empty line
-                f.write("# Another comment\n")
-
-            # Configure with the test CSV
-            Pin.board.configure(test_path)
-
-            # Pin.board: board name → CPU pin
-            assert Pin.board.LED_GREEN == "GPIO_01"
-            assert Pin.board.LED_RED == "GPIO_02"
-            assert Pin.board.SPI5_SCK == "GPIO_10"
-
-            # Pin.cpu: CPU pin → CPU pin (identity)
-            assert Pin.cpu.GPIO_01 == "GPIO_01"
-            assert Pin.cpu.GPIO_02 == "GPIO_02"
-            assert Pin.cpu.GPIO_10 == "GPIO_10"
-
-            # Hidden pin should not be accessible by board name
-            with self.assertRaises(AttributeError) as ctx:
-                _ = Pin.board.HIDDEN_PIN
-            assert "not defined in pins.csv" in str(ctx.exception)
-
-            # Hidden pin's CPU pin (GPIO_99) should not be in Pin.cpu either
-            with self.assertRaises(AttributeError) as ctx:
-                _ = Pin.cpu.GPIO_99
-            assert "not defined in pins.csv" in str(ctx.exception)
-
-            # Undefined pin should raise error in strict mode
-            with self.assertRaises(AttributeError) as ctx:
-                _ = Pin.board.UNDEFINED_PIN
-            assert "not defined in pins.csv" in str(ctx.exception)
-
-            with self.assertRaises(AttributeError) as ctx:
-                _ = Pin.cpu.UNDEFINED_PIN
-            assert "not defined in pins.csv" in str(ctx.exception)
+        path = "test_pins_strict.csv"
+        with open(path, "w") as f:
+            f.write(self.PINS_STRICT_CSV)
+        self.addCleanup(os.remove, path)
+        self.addCleanup(Pin.board.configure, None)
 
-        finally:
-            # Clean up test file
-            try:
-                os.remove(test_path)
-            except OSError:
-                pass
+        Pin.board.configure(path)
+
+        assert Pin.board.LED_GREEN == "GPIO_01"
+        assert Pin.cpu.GPIO_10 == "GPIO_10"
+        with self.assertRaises(AttributeError):
+            _ = Pin.board.HIDDEN_PIN
+        with self.assertRaises(AttributeError):
+            _ = Pin.board.UNDEFINED_PIN
 
     def test_pin_board_fallback_on_missing_file(self):
         """Test Pin.board falls back to magic mode if CSV file doesn't exist"""
+        self.addCleanup(Pin.board.configure, None)
         # Configure with non-existent file
         Pin.board.configure("/this/path/does/not/exist/pins.csv")
 
@@ -306,56 +729,100 @@ class TestPin(unittest.TestCase):
 
     def test_pin_board_reconfigure(self):
         """Test Pin.board can be reconfigured"""
-        import os
+        self.addCleanup(Pin.board.configure, None)
+        # Configure with first CSV
+        Pin.board.configure(io.StringIO(self.PINS_A_CSV))
+        assert Pin.board.PIN_A == "GPIO_01"  # Pin.board returns CPU pin
+        with self.assertRaises(AttributeError):
+            _ = Pin.board.PIN_B
+
+        # Reconfigure with second CSV
+        Pin.board.configure(io.StringIO(self.PINS_B_CSV))
+        assert Pin.board.PIN_B == "GPIO_02"  # Pin.board returns CPU pin
+        with self.assertRaises(AttributeError):
+            _ = Pin.board.PIN_A
+
+        # Reconfigure back to magic mode
+        Pin.board.configure(None)
+        assert Pin.board.PIN_A == "PIN_A"  # Magic mode returns name as-is
+        assert Pin.board.PIN_B == "PIN_B"
 
-        # Create test CSV files
-        test_path1 = "test_pins_a.csv"
-        test_path2 = "test_pins_b.csv"
+    def test_pin_board_cache_cleared_on_configure(self):
+        """Test names resolved before configure() are looked up again afterwards"""
+        self.addCleanup(Pin.board.configure, None)
+        assert Pin.board.LED_BLUE == "LED_BLUE"
+        assert Pin.board.NOT_IN_CSV == "NOT_IN_CSV"
 
-        try:
-            # First configuration
-            with open(test_path1, "w") as f:
-                f.write("PIN_A,GPIO_01\n")
-
-            # Second configuration
-            with open(test_path2, "w") as f:
-                f.write("PIN_B,GPIO_02\n")
-
-            # Configure with first CSV
-            Pin.board.configure(test_path1)
-            assert Pin.board.PIN_A == "GPIO_01"  # Pin.board returns CPU pin
-            with self.assertRaises(AttributeError):
-                _ = Pin.board.PIN_B
-
-            # Reconfigure with second CSV
-            Pin.board.configure(test_path2)
-            assert Pin.board.PIN_B == "GPIO_02"  # Pin.board returns CPU pin
-            with self.assertRaises(AttributeError):
-                _ = Pin.board.PIN_A
-
-            # Reconfigure back to magic mode
-            Pin.board.configure(None)
-            assert Pin.board.PIN_A == "PIN_A"  # Magic mode returns name as-is
-            assert Pin.board.PIN_B == "PIN_B"
+        Pin.board.configure(io.StringIO(self.PINS_CACHE_CSV))
+        assert Pin.board.LED_BLUE == "GPIO_03"
+        with self.assertRaises(AttributeError):
+            _ = Pin.board.NOT_IN_CSV
 
-        finally:
-            # Clean up test files
-            try:
-                os.remove(test_path1)
-            except OSError:
-                pass
-            try:
-                os.remove(test_path2)
-            except OSError:
-                pass
+        Pin.board.configure(None)
+        assert Pin.board.LED_BLUE == "LED_BLUE"
+
+    def test_pin_board_cache_bounded(self):
+        """Test enumerating many magic-mode names keeps the name cache bounded"""
+        self.addCleanup(Pin.board.configure, None)
+        names = [f"CACHE_PIN_{i}" for i in range(300)]
+        for name in names:
+            assert getattr(Pin.board, name) == name
+
+        self.assertLessEqual(len(Pin.board._cached), 256)
+        self.assertNotIn(names[0], Pin.board._cached)
+        # Evicted names still resolve
+        assert getattr(Pin.board, names[0]) == names[0]
+
+
+class TestSignal(unittest.TestCase):
+    def test_signal_invert(self):
+        """Test an inverted Signal drives the opposite pin level."""
+        pin = Pin("SIGNAL_TEST", Pin.OUT, value=0)
+        signal = Signal(pin, invert=True)
+
+        signal.on()
+        self.assertEqual(pin.value(), 0)
+        signal.off()
+        self.assertEqual(pin.value(), 1)
+
+        self.assertEqual(signal.value(1), 1)
+        self.assertEqual(pin.value(), 0)
+        self.assertEqual(signal.value(0), 0)
+        self.assertEqual(pin.value(), 1)
+
+
+class TestRTC(unittest.TestCase):
+    """Test RTC wakeup task."""
+
+    def test_wakeup_stop(self):
+        """Test wakeup callbacks run until stop() is called."""
+        calls = []
+
+        async def run():
+            rtc = RTC()
+            rtc.wakeup(10, lambda: calls.append(time.ticks_ms()))  # pylint: disable=no-member
+            await asyncio.sleep_ms(55)  # pylint: disable=no-member
+            rtc.stop()
+            fired = len(calls)
+            await asyncio.sleep_ms(30)  # pylint: disable=no-member
+            return fired
+
+        fired = asyncio.run(run())
+        self.assertTrue(fired >= 1)
+        self.assertEqual(len(calls), fired)
 
 
 class TestUART(unittest.TestCase):
     """Test UART class with RingIO buffers."""
 
+    def setUp(self):
+        # Tests using the default UART settings share one instance, emptied before each test
+        self.uart = _UART
+        self.uart.reset()
+
     def test_basic_read_write(self):
         """Test basic read and write operations."""
-        uart = UART()
+        uart = self.uart
 
         # Write data
         written = uart.write(b"Hello")
@@ -375,7 +842,7 @@ class TestUART(unittest.TestCase):
 
     def test_inject_data(self):
         """Test dynamic data injection."""
-        uart = UART()
+        uart = self.uart
 
         # Initially no data
         self.assertEqual(uart.any(), 0)
@@ -392,16 +859,17 @@ class TestUART(unittest.TestCase):
 
     def test_multiple_injections(self):
         """Test multiple data injections."""
-        uart = UART()
+        assertEqual = self.assertEqual
+        uart = self.uart
 
         uart.inject_data(b"First ")
         uart.inject_data(b"Second ")
         uart.inject_data(b"Third")
 
         # All data should be concatenated in buffer
-        self.assertEqual(uart.any(), 18)
+        assertEqual(uart.any(), 18)
         data = uart.read()
-        self.assertEqual(data, b"First Second Third")
+        assertEqual(data, b"First Second Third")
 
     def test_partial_read(self):
         """Test reading partial data."""
@@ -430,48 +898,51 @@ class TestUART(unittest.TestCase):
 
     def test_readline(self):
         """Test readline operation."""
+        assertEqual = self.assertEqual
         uart = UART(data_for_read=b"Line1\nLine2\nLine3")
 
         line1 = uart.readline()
-        self.assertEqual(line1, b"Line1\n")
+        assertEqual(line1, b"Line1\n")
 
         line2 = uart.readline()
-        self.assertEqual(line2, b"Line2\n")
+        assertEqual(line2, b"Line2\n")
 
         line3 = uart.readline()
-        self.assertEqual(line3, b"Line3")
+        assertEqual(line3, b"Line3")
 
     def test_any(self):
         """Test any() returns correct byte count."""
-        uart = UART()
+        assertEqual = self.assertEqual
+        uart = self.uart
 
-        self.assertEqual(uart.any(), 0)
+        assertEqual(uart.any(), 0)
 
         uart.inject_data(b"12345")
-        self.assertEqual(uart.any(), 5)
+        assertEqual(uart.any(), 5)
 
         uart.read(2)
-        self.assertEqual(uart.any(), 3)
+        assertEqual(uart.any(), 3)
 
         uart.read()
-        self.assertEqual(uart.any(), 0)
+        assertEqual(uart.any(), 0)
 
     def test_buffer_overflow(self):
         """Test behavior when buffer is full."""
         # Create small buffer
         uart = UART(rxbuf=8)
 
-        # Fill buffer (8 bytes max, RingIO reserves 1)
+        # Fill buffer (8 bytes, RingIO reserves 1 so only 7 fit)
         written = uart.inject_data(b"12345678")
-        self.assertTrue(written <= 8)
+        self.assertEqual(written, 8 - 1)
 
-        # Try to inject more - should write less than requested
+        # Try to inject more - nothing fits
         overflow = uart.inject_data(b"90")
-        self.assertTrue(overflow < 2)
+        self.assertEqual(overflow, 0)
 
     def test_write_buffer_capture(self):
         """Test that written data is captured correctly."""
-        uart = UART()
+        assertEqual = self.assertEqual
+        uart = self.uart
 
         uart.write(b"AT+")
         uart.write(b"CMD")
@@ -479,29 +950,29 @@ class TestUART(unittest.TestCase):
 
         # Should capture all writes
         written_data = uart.get_written_data()
-        self.assertEqual(written_data, b"AT+CMD\r\n")
+        assertEqual(written_data, b"AT+CMD\r\n")
 
     def test_ioctl_poll(self):
         """Test ioctl MP_STREAM_POLL operation."""
-        uart = UART()
+        uart = self.uart
 
         # No data - should return 0
-        result = uart.ioctl(3, 0)  # MP_STREAM_POLL
+        result = uart.ioctl(_MP_STREAM_POLL, 0)
         self.assertEqual(result, 0)
 
         # With data - should return MP_STREAM_POLL_RD
         uart.inject_data(b"data")
-        result = uart.ioctl(3, 0)
-        self.assertEqual(result, 0x0001)  # MP_STREAM_POLL_RD
+        result = uart.ioctl(_MP_STREAM_POLL, 0)
+        self.assertEqual(result, _MP_STREAM_POLL_RD)
 
     def test_custom_buffer_sizes(self):
         """Test UART with custom buffer sizes."""
         uart = UART(rxbuf=16, txbuf=32)
 
-        # Should be able to inject up to rxbuf size
+        # Should be able to inject up to rxbuf size, less the byte RingIO reserves
         data = b"x" * 15
         written = uart.inject_data(data)
-        self.assertTrue(written >= 10)  # At least most of it should fit
+        self.assertEqual(written, 16 - 1)
 
     def test_backward_compatibility(self):
         """Test backward compatibility with read_buf_len parameter."""
@@ -512,21 +983,37 @@ class TestUART(unittest.TestCase):
 
     def test_empty_operations(self):
         """Test operations on empty buffers."""
-        uart = UART()
+        assertEqual = self.assertEqual
+        uart = self.uart
 
         # Reading from empty buffer
         data = uart.read()
-        self.assertEqual(data, b"")
+        assertEqual(data, b"")
 
         data = uart.read(10)
-        self.assertEqual(data, b"")
+        assertEqual(data, b"")
 
         line = uart.readline()
-        self.assertEqual(line, b"")
+        assertEqual(line, b"")
 
         buf = bytearray(4)
         n = uart.readinto(buf)
-        self.assertEqual(n, 0)
+        assertEqual(n, 0)
+
+    def test_subclass_methods(self):
+        """Test a UART subclass keeps its overrides and the forwarding methods."""
+
+        class EchoUART(UART):
+            def write(self, data):
+                self.inject_data(data)
+                return super().write(data)
+
+        uart = EchoUART()
+
+        self.assertEqual(uart.write(b"ping"), 4)
+        self.assertEqual(uart.read(2), b"pi")
+        self.assertEqual(uart.read(), b"ng")
+        self.assertEqual(uart.get_written_data(), b"ping")
 
     def test_constructor_params(self):
         """Test UART accepts standard constructor parameters."""
@@ -552,6 +1039,26 @@ class TestUART(unittest.TestCase):
         data = uart.read()
         self.assertEqual(data, b"Test")
 
+    def test_reset(self):
+        """Test reset() empties both buffers."""
+        uart = self.uart
+        uart.inject_data(b"unread")
+        uart.write(b"uncollected")
+
+        uart.reset()
+
+        self.assertEqual(uart.any(), 0)
+        self.assertEqual(uart.read(), b"")
+        self.assertEqual(uart.get_written_data(), b"")
+
+        # Both buffers are still usable afterwards
+        uart.inject_data(b"again")
+        self.assertEqual(uart.read(), b"again")
+
+
+# Shared by the TestUART tests that use the default UART settings
+_UART = UART()
+
 
 if __name__ == "__main__":
     unittest.main()